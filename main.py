@@ -1,21 +1,101 @@
 import os
 import subprocess
 import shutil
+import hashlib
+import queue
+import threading
+import time
+from functools import lru_cache
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import logging
+import re
+import tarfile
 import tempfile
-import toml 
+import tomllib
 
 FLAIR_DIR = "flair"          # Path to FLAIR bin directory
 OUTPUT_DIR = "output"
 CRATES_DIR = "crates"
 NUM_TOP = 100                # Top 100 crates
+REQUEST_TIMEOUT = 30         # Seconds per HTTP request
+
+# One session for all crates.io traffic: keep-alive connections instead of a
+# fresh TCP+TLS handshake per request, plus retries on transient errors.
+SESSION = requests.Session()
+SESSION.headers["User-Agent"] = "rust-sig-gen (https://github.com/st0de/rust-sig-gen)"
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=5, backoff_factor=0.5,
+                      status_forcelist=[429, 500, 502, 503, 504]),
+))
+
+# One buffered handler instead of per-print flushes; threadName shows which
+# pipeline stage is talking once the stages run concurrently.
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(threadName)s %(message)s")
+log = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(OUTPUT_DIR, ".cache")
+# One cargo target dir per target triple, each shared across all crates.
+# Sharing across crates reuses compiled dependency artifacts; keeping the two
+# triples apart lets the concurrent cargo invocations run without serializing
+# on cargo's exclusive build-directory lock.
+TARGET_DIRS = {"linux": os.path.abspath("target-shared-linux"),
+               "windows": os.path.abspath("target-shared-win")}
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(CRATES_DIR, exist_ok=True)
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+def cached_get_json(url, params=None, ttl=86400):
+    """GET a JSON document with an on-disk cache.
+
+    crates.io rate-limits the API to ~1 req/s, so re-runs should not re-pay
+    for metadata we already have. Responses are cached under output/.cache
+    keyed by (url, params); within `ttl` seconds the cached body is returned
+    without any request, after that we revalidate with If-None-Match and a
+    304 just refreshes the cache's mtime."""
+    key = hashlib.sha256(repr((url, sorted((params or {}).items()))).encode()).hexdigest()
+    body_path = os.path.join(CACHE_DIR, f"{key}.json")
+    etag_path = os.path.join(CACHE_DIR, f"{key}.etag")
+
+    if os.path.exists(body_path):
+        if time.time() - os.path.getmtime(body_path) < ttl:
+            with open(body_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+    headers = {}
+    if os.path.exists(etag_path) and os.path.exists(body_path):
+        with open(etag_path, "r", encoding="utf-8") as f:
+            headers["If-None-Match"] = f.read().strip()
+
+    resp = SESSION.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+    if resp.status_code == 304:
+        os.utime(body_path)  # Still fresh, just restart the TTL clock
+        with open(body_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    resp.raise_for_status()
+
+    # Write body and ETag atomically so a crash can't leave a torn cache entry.
+    tmp_path = body_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(resp.content)
+    os.replace(tmp_path, body_path)
+    if resp.headers.get("ETag"):
+        tmp_path = etag_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(resp.headers["ETag"])
+        os.replace(tmp_path, etag_path)
+
+    return resp.json()
 
 def get_top_crates(n=100):
-    """Fetch top n crates by all-time downloads using the paginated API."""
+    """Fetch top n crates by all-time downloads using the paginated API.
+    Returns list of (name, max_stable_version) tuples — the listing already
+    carries each crate's version, so nothing else needs to resolve it."""
     crates = []
     page = 1
     per_page = 100  # Max allowed
@@ -27,11 +107,9 @@ def get_top_crates(n=100):
             "per_page": per_page,
             "sort": "downloads"  # All-time downloads
         }
-        resp = requests.get(url, params=params)
-        resp.raise_for_status()
-        data = resp.json()
+        data = cached_get_json(url, params=params)
         
-        page_crates = [c["id"] for c in data["crates"]]
+        page_crates = [(c["id"], c["max_stable_version"]) for c in data["crates"]]
         crates.extend(page_crates)
         
         if len(page_crates) < per_page or len(crates) >= n:
@@ -41,83 +119,212 @@ def get_top_crates(n=100):
     
     return crates[:n]  # Trim to exactly n
 
-def download_crate(name, version=None):
-    """Download crate source and extract."""
-    if version is None:
-        # Get latest version
-        url = f"https://crates.io/api/v1/crates/{name}"
-        resp = requests.get(url)
-        resp.raise_for_status()
-        version = resp.json()["crate"]["max_stable_version"]
-    
+def _index_path(name):
+    """Sparse-index path for a crate, per cargo's layout convention."""
+    name = name.lower()
+    if len(name) <= 2:
+        return f"{len(name)}/{name}"
+    if len(name) == 3:
+        return f"3/{name[0]}/{name}"
+    return f"{name[:2]}/{name[2:4]}/{name}"
+
+@lru_cache(maxsize=None)
+def _index_entries(name):
+    """Version records for a crate from the sparse index (one JSON per line).
+
+    https://index.crates.io serves a static CDN file per crate, so this
+    avoids the rate-limited API endpoint entirely. Cached in-process because
+    both version resolution and checksum lookup read the same file."""
+    url = f"https://index.crates.io/{_index_path(name)}"
+    resp = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    return [json.loads(line) for line in resp.text.splitlines() if line]
+
+def crate_checksum(name, version):
+    """SHA-256 hex digest the index records for this version, or None if unknown."""
+    for entry in _index_entries(name):
+        if entry["vers"] == version:
+            return entry.get("cksum")
+    return None
+
+def download_crate(name, version):
+    """Download the crate tarball, verifying its SHA-256. Returns the .crate path."""
     download_url = f"https://static.crates.io/crates/{name}/{name}-{version}.crate"
     tar_path = f"{CRATES_DIR}/{name}-{version}.crate"
-    resp = requests.get(download_url)
-    resp.raise_for_status()
-    with open(tar_path, "wb") as f:
-        f.write(resp.content)
-    
-    extract_dir = f"{CRATES_DIR}"
-    extract_crate_dir = f"{name}-{version}"
-    shutil.unpack_archive(tar_path, extract_dir, "gztar")
-    return os.path.join(extract_dir, extract_crate_dir)
+    expected = crate_checksum(name, version)
+
+    for attempt in range(2):
+        # Stream straight to disk with a 1 MiB buffer; crates can be tens of MB
+        # and buffering the whole body in memory doubles peak RAM for nothing.
+        # The checksum is fed from the same chunks, so verification costs no
+        # second read pass over the file.
+        digest = hashlib.sha256()
+        with SESSION.get(download_url, stream=True, timeout=60) as resp:
+            resp.raise_for_status()
+            with open(tar_path, "wb") as f:
+                for chunk in resp.iter_content(chunk_size=1024 * 1024):
+                    digest.update(chunk)
+                    f.write(chunk)
+        if expected is None or digest.hexdigest() == expected:
+            return tar_path
+        os.remove(tar_path)
+        log.warning("Checksum mismatch for %s-%s (attempt %d), retrying...", name, version, attempt + 1)
+
+    raise RuntimeError(f"Checksum mismatch for {name}-{version}")
+
+def extract_crate(tar_path, dest):
+    """Extract a .crate tarball into dest and delete the tarball.
+    Returns the extracted source directory."""
+    # Open the tar directly instead of going through shutil.unpack_archive's
+    # dispatcher; a 2 MiB copy buffer beats tarfile's 16 KiB default.
+    with tarfile.open(tar_path, "r:gz", copybufsize=2 * 1024 * 1024) as tf:
+        tf.extractall(dest)
+    os.remove(tar_path)  # Reclaim disk, the extracted sources are all we need
+    return os.path.join(dest, os.path.basename(tar_path)[:-len(".crate")])
 
-def build_as_staticlib(crate_dir):
+_CRATE_TYPE_RE = re.compile(r"(?m)^\s*crate-type\s*=.*$")
+_LIB_SECTION_RE = re.compile(r"(?m)^\[lib\]\s*$")
+_RELEASE_PROFILE_RE = re.compile(r"(?m)^\[profile\.release\]\s*$")
+_PANIC_RE = re.compile(r"(?m)^\s*panic\s*=.*$")
+_ANY_HEADER_RE = re.compile(r"(?m)^\[")
+
+def _set_in_section(text, header_re, header, key_re, line, keep_existing=False):
+    """Force `line` inside the TOML section matched by header_re.
+
+    The key is only matched between the section header and the next table
+    header, so a crate-type under [[bin]]/[[example]] or a panic under
+    [profile.dev] never shadows or gets clobbered by the [lib] /
+    [profile.release] edit. If the key exists in the section it is rewritten
+    (or kept, with keep_existing); if the section is missing it is appended."""
+    m = header_re.search(text)
+    if m is None:
+        return text + f"\n{header}\n{line}\n"
+
+    start = m.end()
+    nxt = _ANY_HEADER_RE.search(text, start)
+    end = nxt.start() if nxt is not None else len(text)
+
+    key = key_re.search(text, start, end)
+    if key is not None:
+        if keep_existing:
+            return text
+        return text[:key.start()] + line + text[key.end():]
+    return text[:start] + f"\n{line}" + text[start:]
+
+def staticlib_build_blocker(crate_dir, cargo_toml_text):
+    """Cheap pre-check for crates that can never build as a staticlib.
+
+    proc-macro and bin-only crates always fail the build, but only after
+    paying cargo's full resolution and compile time. Returns a short reason
+    string for such crates, or None if the crate looks buildable.
+
+    Parsed with stdlib tomllib (C-backed, no pure-Python toml dependency),
+    which also can't be fooled by e.g. a proc-macro key inside a dependency
+    table the way a regex scan could."""
+    try:
+        cargo_data = tomllib.loads(cargo_toml_text)
+    except tomllib.TOMLDecodeError:
+        return None  # Let cargo be the judge of a Cargo.toml we can't parse
+
+    lib = cargo_data.get("lib", {})
+    # cargo accepts both spellings of the key
+    if lib.get("proc-macro") or lib.get("proc_macro"):
+        return "proc-macro crate"
+    if not lib and not os.path.exists(os.path.join(crate_dir, "src", "lib.rs")):
+        return "no [lib] section and no src/lib.rs (bin-only crate)"
+    return None
+
+def force_staticlib_config(cargo_toml_path):
+    """Force crate-type = ["staticlib"] and panic = "abort" in Cargo.toml.
+
+    Done with plain text edits guarded by regex presence checks: a full
+    toml.load/toml.dump round-trip parses the whole file with pure-Python
+    toml and destroys comments/ordering, all to touch two keys."""
+    with open(cargo_toml_path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    text = _set_in_section(text, _LIB_SECTION_RE, "[lib]",
+                           _CRATE_TYPE_RE, 'crate-type = ["staticlib"]')
+    text = _set_in_section(text, _RELEASE_PROFILE_RE, "[profile.release]",
+                           _PANIC_RE, 'panic = "abort"', keep_existing=True)
+
+    with open(cargo_toml_path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def build_as_staticlib(crate_dir, crate_name, want_linux=True, want_win=True):
     """Build crate as staticlib for Linux (default) and Windows MSVC targets.
     Returns list of strings: paths to generated .a and/or .lib files."""
     cargo_toml_path = os.path.join(crate_dir, "Cargo.toml")
-    
     with open(cargo_toml_path, "r", encoding="utf-8") as f:
-        cargo_data = toml.load(f)
-    
-    # Force staticlib
-    cargo_data.setdefault("lib", {})["crate-type"] = ["staticlib"]
-    
-    # Add panic = "abort" if not present
-    release_profile = cargo_data.setdefault("profile", {}).setdefault("release", {})
-    if "panic" not in release_profile:
-        release_profile["panic"] = "abort"
-    
-    with open(cargo_toml_path, "w", encoding="utf-8") as f:
-        toml.dump(cargo_data, f)
-    
+        cargo_toml_text = f.read()
+
+    reason = staticlib_build_blocker(crate_dir, cargo_toml_text)
+    if reason:
+        log.info("Skipping build for %s: %s", crate_name, reason)
+        return []
+
+    force_staticlib_config(cargo_toml_path)
+
     built_libs = []
-    
-    try:
-        # 1. Default target (Linux -> .a)
-        print("  Building default target (Linux ELF)...")
-        subprocess.check_call(["cargo", "build", "--release"], cwd=crate_dir)
-        
-        linux_dir = os.path.join(crate_dir, "target", "release")
-        linux_lib = find_static_lib(linux_dir)
-        if linux_lib:
-            built_libs.append(linux_lib)
-        
-        # 2. Windows MSVC target (-> .lib)
-        print("  Building x86_64-pc-windows-msvc (Windows PE)...")
-        subprocess.check_call([
-            "cargo", "build", "--release", "--target", "x86_64-pc-windows-msvc"
-        ], cwd=crate_dir)
-        
-        win_dir = os.path.join(crate_dir, "target", "x86_64-pc-windows-msvc", "release")
-        print(f"!!!!!!!!!!!!!{win_dir}")
-        win_lib = find_static_lib(win_dir)
-        if win_lib:
-            print(f"!!!!!!!!!!!!!Created {win_lib}")
-            built_libs.append(win_lib)
-    
-    except subprocess.CalledProcessError as e:
-        print(f"  Build failed: {e}")
-        # Continue with whatever was built successfully
-    
+
+    # Each crate builds into the per-triple shared target dirs, so common
+    # dependencies (syn, serde, libc, ...) compile once instead of once per crate.
+    base_env = {**os.environ, "CARGO_INCREMENTAL": "0"}
+    if shutil.which("sccache"):
+        base_env["RUSTC_WRAPPER"] = "sccache"
+
+    # Launch both target builds at once: each has its own target dir, so the
+    # cargo processes don't contend for the build-directory lock.
+    builds = []
+    if want_linux:
+        builds.append(("linux", ["cargo", "build", "--release"],
+                       os.path.join(TARGET_DIRS["linux"], "release")))
+    if want_win:
+        builds.append(("windows", ["cargo", "build", "--release", "--target", "x86_64-pc-windows-msvc"],
+                       os.path.join(TARGET_DIRS["windows"], "x86_64-pc-windows-msvc", "release")))
+
+    log.info("Building targets in parallel for %s: %s", crate_name, ", ".join(label for label, _, _ in builds))
+    procs = []
+    for label, cmd, lib_dir in builds:
+        # Log to a file per target: piping to PIPE without a reader deadlocks
+        # once cargo fills the pipe buffer.
+        log_file = open(os.path.join(crate_dir, f"build-{label}.log"), "wb")
+        env = {**base_env, "CARGO_TARGET_DIR": TARGET_DIRS[label]}
+        proc = subprocess.Popen(cmd, cwd=crate_dir, env=env,
+                                stdout=log_file, stderr=subprocess.STDOUT)
+        procs.append((label, proc, log_file, lib_dir))
+
+    for label, proc, log_file, lib_dir in procs:
+        rc = proc.wait()
+        log_file.close()
+        if rc != 0:
+            # The crate dir (and this log with it) lives in a temp dir that is
+            # reclaimed right after the build, so park the log under output/
+            # where the operator can actually read it.
+            saved_log = os.path.join(OUTPUT_DIR, f"{crate_name}-build-{label}.log")
+            shutil.copyfile(log_file.name, saved_log)
+            log.warning("%s build failed (exit %d), see %s", label, rc, saved_log)
+            continue  # Keep whatever the other target produced
+        lib = find_static_lib(lib_dir, crate_name)
+        if lib:
+            built_libs.append(lib)
+
     return built_libs  # ← Now returns only [str, str] or [] — no tuples!
 
-def find_static_lib(target_dir):
+def find_static_lib(target_dir, crate_name):
+    # The shared target dir accumulates staticlibs from every crate, so match
+    # this crate's lib name (cargo maps dashes to underscores) instead of
+    # grabbing the first .a/.lib found.
     if not os.path.isdir(target_dir):
         return None
-    for file in os.listdir(target_dir):
-        if file.endswith((".a", ".lib")):
-            return os.path.join(target_dir, file)
+    lib_name = crate_name.replace("-", "_")
+    wanted = (f"lib{lib_name}.a", f"{lib_name}.lib")
+    # scandir streams directory entries, so we stop at the first hit instead
+    # of materializing the hundreds of files cargo leaves in release dirs.
+    with os.scandir(target_dir) as entries:
+        for entry in entries:
+            if entry.name in wanted:
+                return entry.path
     return None
 
 def generate_pat(static_lib_paths, crate_name):
@@ -129,7 +336,7 @@ def generate_pat(static_lib_paths, crate_name):
     
     for lib_path in static_lib_paths:
         if not os.path.exists(lib_path):
-            print(f"Warning: Static lib not found, skipping: {lib_path}")
+            log.warning("Static lib not found, skipping: %s", lib_path)
             continue
         
         # Detect platform by file extension
@@ -144,7 +351,7 @@ def generate_pat(static_lib_paths, crate_name):
             tool_path = os.path.join(FLAIR_DIR, "pcf")
             suffix = "_win"
         else:
-            print(f"Unknown static lib format, skipping: {lib_path}")
+            log.warning("Unknown static lib format, skipping: %s", lib_path)
             continue
         
         if not os.path.exists(tool_path):
@@ -152,21 +359,37 @@ def generate_pat(static_lib_paths, crate_name):
         
         pat_path = os.path.join(OUTPUT_DIR, f"{crate_name}{suffix}.pat")
         
-        print(f"Generating {platform} .pat using {tool_name} → {os.path.basename(pat_path)}")
+        log.info("Generating %s .pat using %s → %s", platform, tool_name, os.path.basename(pat_path))
         try:
             subprocess.check_call([tool_path, lib_path, pat_path])
             if os.path.exists(pat_path):
                 generated_pats.append(pat_path)
-                print(f"Success: {pat_path}")
+                log.info("Success: %s", pat_path)
             else:
-                print(f"Failed: .pat file was not created")
+                log.warning(".pat file was not created")
         except subprocess.CalledProcessError as e:
-            print(f"Error running {tool_name}: {e}")
+            log.warning("Error running %s: %s", tool_name, e)
     
     return generated_pats
 
-def generate_sig(pat_path, crate_name):
-    
+# Comment lines (";"-prefixed) and blank lines in a sigmake .exc file
+_EXC_JUNK_RE = re.compile(rb"(?m)^(?:;.*\n?|[ \t\r]*\n)")
+
+def generate_sigs(pat_paths, crate_name):
+    """Run sigmake over all of a crate's .pat files in one batch.
+
+    The linux and windows pats have to stay separate .sig files (IDA applies
+    signatures per architecture), so sigmake is still invoked once per
+    platform, but the whole batch is handled here in one call so main() does
+    a single dispatch per crate. Returns the list of generated .sig paths."""
+    sig_paths = []
+    for pat_path in pat_paths:
+        sig_path = _run_sigmake(pat_path)
+        if sig_path:
+            sig_paths.append(sig_path)
+    return sig_paths
+
+def _run_sigmake(pat_path):
     # Determine signature base name from the .pat filename
     sig_base_name = os.path.basename(pat_path[:-4])
     sig_path = os.path.join(OUTPUT_DIR, f"{sig_base_name}.sig")
@@ -179,64 +402,157 @@ def generate_sig(pat_path, crate_name):
     if not os.path.exists(sigmake_path):
         raise FileNotFoundError("sigmake not found in FLAIR directory")
     
-    print(f"Generating signature: {sig_base_name}.sig")
+    log.info("Generating signature: %s.sig", sig_base_name)
     
     try:
         subprocess.check_call([sigmake_path, pat_path, sig_path])
     except subprocess.CalledProcessError:
-        print(f"  Collisions detected for {sig_base_name}, attempting to resolve...")
+        log.info("Collisions detected for %s, attempting to resolve...", sig_base_name)
         
         if os.path.exists(exc_path):
-            # Remove commented lines (common fix for collisions)
-            with open(exc_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-            with open(exc_path, "w", encoding="utf-8") as f:
-                for line in lines:
-                    if line.strip() and not line.startswith(";"):
-                        f.write(line)
+            # Remove commented/blank lines (common fix for collisions) with a
+            # single bytes-level regex pass: the hot loop stays in C and the
+            # file is never decoded to str -- sigmake reads bytes anyway.
+            with open(exc_path, "rb") as f:
+                buf = f.read()
+            with open(exc_path, "wb") as f:
+                f.write(_EXC_JUNK_RE.sub(b"", buf))
             # Retry
             subprocess.check_call([sigmake_path, pat_path, sig_path])
         else:
-            print(f"  No .exc file generated — signature may have too many collisions")
+            log.warning("No .exc file generated — signature may have too many collisions")
             return None
     
     if os.path.exists(sig_path):
-        print(f"  Success: {os.path.basename(sig_path)} created")
+        log.info("Success: %s created", os.path.basename(sig_path))
         return sig_path
     else:
-        print(f"  Failed to create signature")
+        log.warning("Failed to create signature")
         return None
 
-def main():
-    top_crates = get_top_crates(NUM_TOP)
-    print(f"Top {NUM_TOP} crates: {top_crates}")
-    
-    for name in top_crates:
-        print(f"\nProcessing {name}...")
+# Pipeline: download (network) → build (CPU) → pat → sig (subprocess). The
+# stages overlap across crates — while crate N builds, crate N+1 downloads and
+# crate N-1 runs FLAIR. Bounded queues give backpressure so downloads can't
+# pile tarballs up on disk faster than the builders drain them.
+_STOP = object()  # Sentinel telling a pipeline worker to shut down
+
+def _worker(in_q, handler):
+    while True:
+        item = in_q.get()
+        if item is _STOP:
+            break
+        handler(*item)
+
+def _run_stage_threads(n, name, in_q, handler):
+    threads = [threading.Thread(target=_worker, args=(in_q, handler),
+                                name=f"{name}-{i}", daemon=True)
+               for i in range(n)]
+    for t in threads:
+        t.start()
+    return threads
+
+def _drain_stage(threads, in_q):
+    for _ in threads:
+        in_q.put(_STOP)
+    for t in threads:
+        t.join()
 
+def run_pipeline(pending):
+    """Run download/build/pat/sig as overlapping stages across crates.
+
+    `pending` maps crate name -> (version, set of platforms still missing a
+    .sig). Downloads use 4 threads (latency-bound); the other stages use one thread
+    each since cargo parallelizes internally and FLAIR is quick. Returns a
+    dict of crate name -> list of .sig paths, or an error string on failure."""
+    download_q = queue.Queue()
+    build_q = queue.Queue(maxsize=4)
+    pat_q = queue.Queue(maxsize=4)
+    sig_q = queue.Queue(maxsize=4)
+    results = {}
+
+    def download_stage(name, version, missing):
+        try:
+            build_q.put((name, missing, download_crate(name, version)))
+        except Exception as e:
+            results[name] = f"download failed: {e}"
+
+    def build_stage(name, missing, tar_path):
+        try:
+            # Extract into a temp dir that is reclaimed as soon as the build
+            # finishes; the staticlibs land in the shared target dir, so
+            # nothing under the sources is needed afterwards.
+            with tempfile.TemporaryDirectory(dir=CRATES_DIR) as tmp_dir:
+                crate_dir = extract_crate(tar_path, tmp_dir)
+                lib_paths = build_as_staticlib(crate_dir, name,
+                                               want_linux="linux" in missing,
+                                               want_win="windows" in missing)
+            if lib_paths:
+                pat_q.put((name, lib_paths))
+            else:
+                results[name] = "no static libraries built"
+        except Exception as e:
+            results[name] = f"build failed: {e}"
+
+    def pat_stage(name, lib_paths):
         try:
-            crate_dir = download_crate(name)
-            lib_paths = build_as_staticlib(crate_dir)  # Returns list[str] of .a and/or .lib paths
-            
-            if not lib_paths:
-                print(f"No static libraries built for {name}")
-                continue
-            
-            # Generate both .pat files (linux + windows if available)
             pat_paths = generate_pat(lib_paths, name)
-            
-            if not pat_paths:
-                print("No .pat files generated")
-                continue
-            
-            # Generate .sig for each .pat
-            for pat_path in pat_paths:
-                sig_path = generate_sig(pat_path, name)
-                if sig_path:
-                    print(f"Completed: {os.path.basename(sig_path)}\n")
-                
+            if pat_paths:
+                sig_q.put((name, pat_paths))
+            else:
+                results[name] = "no .pat files generated"
+        except Exception as e:
+            results[name] = f"pat generation failed: {e}"
+
+    def sig_stage(name, pat_paths):
+        try:
+            results[name] = generate_sigs(pat_paths, name)
         except Exception as e:
-            print(f"Failed for {name}: {e}\n")
+            results[name] = f"sig generation failed: {e}"
+
+    downloaders = _run_stage_threads(4, "download", download_q, download_stage)
+    builders = _run_stage_threads(1, "build", build_q, build_stage)
+    pat_workers = _run_stage_threads(1, "pat", pat_q, pat_stage)
+    sig_workers = _run_stage_threads(1, "sig", sig_q, sig_stage)
+
+    for name, (version, missing) in pending.items():
+        download_q.put((name, version, missing))
+
+    # Shut the stages down in order so each queue drains before its consumers exit.
+    _drain_stage(downloaders, download_q)
+    _drain_stage(builders, build_q)
+    _drain_stage(pat_workers, pat_q)
+    _drain_stage(sig_workers, sig_q)
+    return results
+
+def missing_platforms(name):
+    """Set of platforms ("linux"/"windows") whose .sig is not in output/ yet."""
+    expected = {"linux": os.path.join(OUTPUT_DIR, f"{name}_linux.sig"),
+                "windows": os.path.join(OUTPUT_DIR, f"{name}_win.sig")}
+    return {plat for plat, path in expected.items() if not os.path.exists(path)}
+
+def main():
+    top_crates = get_top_crates(NUM_TOP)
+    log.info("Top %d crates: %s", NUM_TOP, [name for name, _ in top_crates])
+
+    # Resume support: don't re-download or rebuild crates whose signatures
+    # already exist from a previous run.
+    pending = {name: (version, missing_platforms(name)) for name, version in top_crates}
+    done = [name for name, (_, missing) in pending.items() if not missing]
+    if done:
+        log.info("Skipping %d crates with existing signatures: %s", len(done), done)
+
+    results = run_pipeline({name: item for name, item in pending.items() if item[1]})
+
+    succeeded = {name: r for name, r in results.items() if isinstance(r, list)}
+    failed = {name: r for name, r in results.items() if isinstance(r, str)}
+
+    log.info("Generated signatures for %d crates", len(succeeded))
+    for name, sig_paths in sorted(succeeded.items()):
+        log.info("  %s: %s", name, ", ".join(os.path.basename(p) for p in sig_paths))
+    if failed:
+        log.warning("Failed for %d crates:", len(failed))
+        for name, reason in sorted(failed.items()):
+            log.warning("  %s: %s", name, reason)
 
 if __name__ == "__main__":
     main()